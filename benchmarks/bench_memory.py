@@ -0,0 +1,84 @@
+"""
+Memory used by qth_zwave's Network/Node/Value mirror of a ZWave network with
+1k, 5k and 10k values.
+
+Reports the memory allocated (per tracemalloc) and the number of
+GC-tracked objects created while populating the network, along with the
+time taken by a full garbage collection afterwards. Memory held by
+asyncio's registry of tasks is excluded: its size depends on the peak number
+of concurrently running tasks rather than on the mirror itself.
+
+Usage::
+    
+    python benchmarks/bench_memory.py [--repo PATH]
+"""
+
+import gc
+import time
+import asyncio
+import tracemalloc
+
+from fake_openzwave import (get_argument_parser, import_qth_zwave,
+                            FakeClient, make_network)
+
+
+async def populate(qth_zwave, loop, ozw_network):
+    """Mirror every node and value of the network."""
+    network = qth_zwave.Network(FakeClient(), loop, ozw_network, "sys/zwave/",
+                                statistics_interval=0)
+    await network.init_async()
+    for ozw_node in ozw_network.nodes.values():
+        await network.on_nodes_changed(ozw_node)
+        await network.on_value_changed(ozw_node,
+                                       next(iter(ozw_node.values.values())))
+    return network
+
+
+def measure(qth_zwave, loop, num_values):
+    ozw_network = make_network(num_values)
+    
+    gc.collect()
+    num_objects_before = len(gc.get_objects())
+    tracemalloc.start()
+    
+    network = loop.run_until_complete(populate(qth_zwave, loop, ozw_network))
+    
+    gc.collect()
+    num_objects = len(gc.get_objects()) - num_objects_before
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        # asyncio.all_tasks() WeakSet
+        tracemalloc.Filter(False, "*/_weakrefset.py"),
+    ])
+    allocated = sum(stat.size for stat in snapshot.statistics("filename"))
+    tracemalloc.stop()
+    
+    before = time.perf_counter()
+    gc.collect()
+    gc_time = time.perf_counter() - before
+    
+    # Keep the network alive until measurements are complete
+    del network
+    
+    return allocated, num_objects, gc_time
+
+
+def main():
+    parser = get_argument_parser(__doc__.strip().split("\n")[0])
+    args = parser.parse_args()
+    
+    qth_zwave = import_qth_zwave(args.repo)
+    
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    
+    print("{:>7} {:>12} {:>12} {:>14} {:>12}".format(
+        "values", "total (KiB)", "per value (B)", "GC objects", "GC time (ms)"))
+    for num_values in [1000, 5000, 10000]:
+        allocated, num_objects, gc_time = measure(qth_zwave, loop, num_values)
+        print("{:>7} {:>12.0f} {:>12.0f} {:>14} {:>12.1f}".format(
+            num_values, allocated / 1024, allocated / num_values,
+            num_objects, gc_time * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+CPU cost of delivering a ZWave value change notification to qth_zwave via
+pydispatch receivers versus the fast notification path.
+
+Notifications are delivered to the (fake) python-openzwave watcher exactly as
+libopenzwave would. Two costs are reported per notification: the time spent
+in the watcher (i.e. on the OpenZWave thread) and the total time including
+processing the resulting task on the event loop.
+
+Usage::
+    
+    python benchmarks/bench_notifications.py [--repo PATH] [--num N]
+"""
+
+import time
+import argparse
+import asyncio
+import tempfile
+
+from fake_openzwave import (get_argument_parser, import_qth_zwave,
+                            run_measurement, FakeClient, populate,
+                            value_notification)
+
+
+def measure(qth_zwave, fast_notifications, num_notifications):
+    qth_zwave.qth.Client = FakeClient
+    
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    
+    bridge = qth_zwave.QthZwave(zwave_config_path=None,
+                                zwave_user_path=tempfile.mkdtemp(),
+                                loop=loop,
+                                fast_notifications=fast_notifications,
+                                statistics_interval=0)
+    manager = bridge._ozw_network.manager
+    
+    def drain():
+        loop.run_until_complete(asyncio.gather(
+            *(group.wait() for group in bridge._task_groups)))
+    
+    values = populate(bridge)
+    drain()
+    
+    notifications = [value_notification(values[num % len(values)], num)
+                     for num in range(num_notifications)]
+    
+    before = time.process_time()
+    for notification in notifications:
+        manager.notify(notification)
+    watcher_time = time.process_time() - before
+    drain()
+    total_time = time.process_time() - before
+    
+    return (watcher_time / num_notifications,
+            total_time / num_notifications)
+
+
+def main():
+    parser = get_argument_parser(__doc__.strip().split("\n")[0])
+    parser.add_argument("--num", type=int, default=20000,
+                        help="Number of notifications to deliver.")
+    parser.add_argument("--mode", choices=["pydispatch", "fast"],
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.mode is not None:
+        # Run a single measurement (see run_measurement)
+        qth_zwave = import_qth_zwave(args.repo)
+        watcher_time, total_time = measure(qth_zwave, args.mode == "fast",
+                                           args.num)
+        print("{} {}".format(watcher_time, total_time))
+        return
+    
+    print("{:>10} {:>14} {:>14}".format("path", "watcher (us)", "total (us)"))
+    for mode in ["pydispatch", "fast"]:
+        watcher_time, total_time = run_measurement(
+            __file__, args.repo, num=args.num, mode=mode)
+        print("{:>10} {:>14.1f} {:>14.1f}".format(
+            mode, watcher_time * 1e6, total_time * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Throughput of ZWave value change events through qth_zwave under different
+event loop configurations: the standard asyncio loop or uvloop (if
+installed), each with asyncio debug mode on and off.
+
+Each configuration is measured in a separate process. Notifications are
+delivered to the (fake) python-openzwave watcher and the time until all
+resulting tasks have completed is measured.
+
+Usage::
+    
+    python benchmarks/bench_throughput.py [--repo PATH] [--num N]
+"""
+
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+
+from fake_openzwave import (get_argument_parser, import_qth_zwave,
+                            run_measurement, FakeClient, populate,
+                            value_notification)
+
+
+def run_until_idle(loop, ignored_tasks):
+    """Run the loop until all tasks (except those ignored) are complete."""
+    while True:
+        tasks = asyncio.all_tasks(loop) - ignored_tasks
+        if not tasks:
+            break
+        loop.run_until_complete(asyncio.wait(tasks))
+
+
+def measure(qth_zwave, loop, num_notifications):
+    qth_zwave.qth.Client = FakeClient
+    
+    bridge = qth_zwave.QthZwave(zwave_config_path=None,
+                                zwave_user_path=tempfile.mkdtemp(),
+                                loop=loop)
+    manager = bridge._ozw_network.manager
+    
+    values = populate(bridge)
+    
+    # NB: Long-running background tasks (e.g. statistics collection) are
+    # started during initialisation and never complete.
+    loop.run_until_complete(asyncio.sleep(0.1))
+    background_tasks = asyncio.all_tasks(loop)
+    run_until_idle(loop, background_tasks)
+    
+    notifications = [value_notification(values[num % len(values)], num + 1)
+                     for num in range(num_notifications)]
+    
+    before = time.perf_counter()
+    for notification in notifications:
+        manager.notify(notification)
+    run_until_idle(loop, background_tasks)
+    return num_notifications / (time.perf_counter() - before)
+
+
+def main():
+    parser = get_argument_parser(__doc__.strip().split("\n")[0])
+    parser.add_argument("--num", type=int, default=20000,
+                        help="Number of notifications to deliver.")
+    parser.add_argument("--loop", choices=["asyncio", "uvloop"],
+                        help=argparse.SUPPRESS)
+    parser.add_argument("--debug", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.loop is not None:
+        # Run a single measurement (see run_measurement)
+        qth_zwave = import_qth_zwave(args.repo)
+        if args.loop == "uvloop":
+            import uvloop
+            loop = uvloop.new_event_loop()
+        else:
+            loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.set_debug(bool(args.debug))
+        # Don't report slow callbacks in debug mode
+        logging.getLogger("asyncio").setLevel(logging.CRITICAL)
+        print(measure(qth_zwave, loop, args.num))
+        return
+    
+    try:
+        import uvloop
+        loops = ["asyncio", "uvloop"]
+    except ImportError:
+        loops = ["asyncio"]
+    
+    print("{:>8} {:>6} {:>14}".format("loop", "debug", "events/s"))
+    for loop in loops:
+        for debug in [1, 0]:
+            events_per_second, = run_measurement(
+                __file__, args.repo, num=args.num, loop=loop, debug=debug)
+            print("{:>8} {:>6} {:>14.0f}".format(
+                loop, "on" if debug else "off", events_per_second))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Minimal stand-ins for python-openzwave and the Qth client, sufficient to
+import qth_zwave and drive its Network, Node and Value classes without ZWave
+hardware or an MQTT broker.
+
+The fake ZWaveNetwork mimics the parts of python-openzwave which matter for
+performance: a libopenzwave-style manager which holds a single watcher and
+a ``zwcallback`` which updates the network's node/value objects and then
+sends the corresponding pydispatch signal.
+
+Benchmarks accept a ``--repo`` argument giving the checkout of qth_zwave to
+benchmark (defaulting to the one containing this directory), making it
+possible to compare against an older revision.
+"""
+
+import os
+import sys
+import types
+import argparse
+import subprocess
+
+from pydispatch import dispatcher
+
+
+def get_argument_parser(description):
+    """An ArgumentParser with the arguments common to all benchmarks."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--repo", default=os.path.join(os.path.dirname(__file__), ".."),
+        help="Path of the qth_zwave checkout to benchmark.")
+    return parser
+
+
+def run_measurement(script, repo, **arguments):
+    """
+    Run a benchmark script in a subprocess (since pydispatch receivers are
+    global) with the given repo and (hidden) measurement arguments. Returns
+    the whitespace-separated numbers it prints.
+    """
+    command = [sys.executable, "-W", "ignore", script, "--repo", repo]
+    for name, value in arguments.items():
+        command.extend(["--{}".format(name), str(value)])
+    return list(map(float, subprocess.check_output(command).split()))
+
+
+def import_qth_zwave(repo):
+    """
+    Install the fake openzwave modules and import qth_zwave from the given
+    checkout.
+    """
+    openzwave = types.ModuleType("openzwave")
+    option = types.ModuleType("openzwave.option")
+    network = types.ModuleType("openzwave.network")
+    option.ZWaveOption = FakeZWaveOption
+    network.ZWaveNetwork = FakeZWaveNetwork
+    openzwave.option = option
+    openzwave.network = network
+    sys.modules.update({
+        "openzwave": openzwave,
+        "openzwave.option": option,
+        "openzwave.network": network,
+    })
+    
+    sys.path.insert(0, os.path.abspath(repo))
+    import qth_zwave
+    return qth_zwave
+
+
+class FakeClient(object):
+    """A Qth client which accepts (and counts) all requests."""
+    
+    def __init__(self, *args, **kwargs):
+        self.num_requests = 0
+    
+    async def _request(self, *args, **kwargs):
+        self.num_requests += 1
+    
+    register = unregister = _request
+    set_property = delete_property = _request
+    watch_property = unwatch_property = _request
+    watch_event = unwatch_event = _request
+    
+    async def close(self):
+        pass
+
+
+class FakeZWaveOption(object):
+    
+    def __init__(self, *args, **kwargs):
+        pass
+    
+    def __getattr__(self, name):
+        # set_log_file, set_logging, lock, ...
+        return lambda *args, **kwargs: None
+
+
+class FakeValue(object):
+    
+    def __init__(self, node, value_id, label):
+        self.node = node
+        self.value_id = value_id
+        self.label = label
+        self.data = 0
+        self.units = "%"
+        self.is_read_only = False
+    
+    def check_data(self, data):
+        return data
+    
+    def refresh(self):
+        pass
+
+
+class FakeNode(object):
+    
+    def __init__(self, home_id, node_id, value_labels):
+        self.home_id = home_id
+        self.node_id = node_id
+        self.is_failed = False
+        self.manufacturer_id = "0x0086"
+        self.manufacturer_name = "Aeotec"
+        self.product_id = "0x0064"
+        self.product_name = "Multisensor"
+        self.product_type = "0x0102"
+        self.neighbors = set([1])
+        # As returned by libopenzwave's getNodeStatistics
+        self.stats = {
+            "sentCnt": 100,
+            "sentFailed": 1,
+            "retries": 3,
+            "receivedCnt": 120,
+            "receivedDups": 0,
+            "receivedUnsolicited": 20,
+            "averageRequestRTT": 40,
+            "averageResponseRTT": 60,
+            "lastRequestRTT": 38,
+            "lastResponseRTT": 55,
+            "quality": 0,
+        }
+        self.values = {}
+        for num, label in enumerate(value_labels):
+            value_id = (node_id << 32) | num
+            self.values[value_id] = FakeValue(self, value_id, label)
+    
+    def heal(self, up_node_route=False):
+        pass
+
+
+class FakeManager(object):
+    """
+    Like libopenzwave's PyManager, holds just one watcher callback.
+    """
+    
+    def __init__(self):
+        self._watcher_callback = None
+    
+    def addWatcher(self, callback):
+        self._watcher_callback = callback
+    
+    def removeWatcher(self, callback):
+        self._watcher_callback = None
+    
+    def notify(self, args):
+        """Deliver a notification (as libopenzwave would)."""
+        self._watcher_callback(args)
+
+
+class FakeZWaveNetwork(object):
+    
+    STATE_READY = 10
+    
+    SIGNAL_NETWORK_FAILED = "NetworkFailed"
+    SIGNAL_NETWORK_STARTED = "NetworkStarted"
+    SIGNAL_NETWORK_READY = "NetworkReady"
+    SIGNAL_NETWORK_STOPPED = "NetworkStopped"
+    SIGNAL_NETWORK_RESETTED = "DriverResetted"
+    SIGNAL_NETWORK_AWAKED = "DriverAwaked"
+    SIGNAL_NODE_ADDED = "NodeAdded"
+    SIGNAL_NODE_REMOVED = "NodeRemoved"
+    SIGNAL_NODE_EVENT = "NodeEvent"
+    SIGNAL_VALUE_ADDED = "ValueAdded"
+    SIGNAL_VALUE_REMOVED = "ValueRemoved"
+    SIGNAL_VALUE_REFRESHED = "ValueRefreshed"
+    SIGNAL_VALUE_CHANGED = "ValueChanged"
+    
+    def __init__(self, options=None, autostart=False):
+        self.home_id = 0xCAFE
+        self.state = self.STATE_READY
+        self.state_str = "Ready"
+        self.controller = None
+        self.nodes = {}
+        self.manager = FakeManager()
+    
+    def add_node(self, node_id, value_labels):
+        node = FakeNode(self.home_id, node_id, value_labels)
+        self.nodes[node_id] = node
+        return node
+    
+    def start(self):
+        self.manager.addWatcher(self.zwcallback)
+    
+    def stop(self):
+        self.manager.removeWatcher(self.zwcallback)
+        dispatcher.send(self.SIGNAL_NETWORK_STOPPED, **{"network": self})
+    
+    def zwcallback(self, args):
+        """
+        Mimics python-openzwave's watcher: look up (and update) the node and
+        value objects then send the corresponding signal via pydispatch.
+        """
+        notification_type = args["notificationType"]
+        node = self.nodes.get(args["nodeId"])
+        if notification_type in ("ValueAdded", "ValueChanged",
+                                 "ValueRefreshed", "ValueRemoved"):
+            value = node.values[args["valueId"]["id"]]
+            value.data = args["valueId"]["value"]
+            dispatcher.send(notification_type, **{"network": self,
+                                                  "node": node,
+                                                  "value": value})
+        elif notification_type in ("NodeAdded", "NodeEvent", "NodeRemoved"):
+            dispatcher.send(notification_type, **{"network": self,
+                                                  "node": node})
+
+
+def value_notification(value, data, notification_type="ValueChanged"):
+    """Build a libopenzwave-style notification dictionary for a value."""
+    return {
+        "notificationType": notification_type,
+        "homeId": value.node.home_id,
+        "nodeId": value.node.node_id,
+        "valueId": {
+            "id": value.value_id,
+            "label": value.label,
+            "value": data,
+            "units": value.units,
+            "readOnly": value.is_read_only,
+        },
+    }
+
+
+# Value labels used for each fake node. Includes duplicates to exercise label
+# suffixing.
+VALUE_LABELS = ["Level", "Switch", "Power", "Energy", "Temperature",
+                "Luminance", "Relative Humidity", "Battery Level",
+                "Level", "Power"]
+
+
+def populate(bridge, num_nodes=10):
+    """
+    Add nodes to a QthZwave bridge's fake network, delivering the NodeAdded
+    and ValueAdded notifications for each via the watcher. Returns the list
+    of FakeValues added.
+    """
+    ozw_network = bridge._ozw_network
+    values = []
+    for node_id in range(2, 2 + num_nodes):
+        ozw_node = ozw_network.add_node(node_id, VALUE_LABELS * 10)
+        ozw_network.manager.notify({"notificationType": "NodeAdded",
+                                    "homeId": ozw_network.home_id,
+                                    "nodeId": node_id})
+        for ozw_value in ozw_node.values.values():
+            ozw_network.manager.notify(
+                value_notification(ozw_value, 0, "ValueAdded"))
+            values.append(ozw_value)
+    return values
+
+
+def make_network(num_values, values_per_node=100):
+    """Create a FakeZWaveNetwork with (about) the specified number of values."""
+    network = FakeZWaveNetwork()
+    for node_num in range(max(1, num_values // values_per_node)):
+        network.add_node(node_num + 2, [
+            VALUE_LABELS[num % len(VALUE_LABELS)]
+            for num in range(values_per_node)
+        ])
+    return network
+
@@ -1,10 +1,13 @@
 #!/usr/bin/env python
 
-import re
 import os
 import os.path
+import sys
 import asyncio
 import functools
+import threading
+import concurrent.futures
+import datetime
 import json
 
 from pydispatch import dispatcher
@@ -16,41 +19,77 @@ import qth
 
 from .version import __version__
 
-def normalise_value_label(label, used_labels=set()):
+from .heal import HealScheduler
+from .statistics import StatisticsCollector
+from .tasks import TaskGroup
+from .labels import normalise_value_label, LabelIndex
+
+class InitialisationTable(object):
     """
-    Given the label of a ZWave value, convert this into a space- and
-    punctuation-free all-lowercase equivalent.
+    A single table recording which objects have not yet completed their
+    asynchronous initialisation. This is shared by all nodes and values on a
+    network in place of a separate :py:class:`asyncio.Event` per object.
+    
+    Only objects whose initialisation is pending are held by the table so it
+    empties once the network has been discovered.
     """
-    label = re.sub(r"[^\w]+", "-", label).strip("-").lower()
-    if label not in used_labels:
-        return label
-    else:
-        num = 2
-        while "{}{}".format(label, num) in used_labels:
-            num += 1
-        return "{}{}".format(label, num)
+    
+    __slots__ = ["_loop", "_pending", "_waiters"]
+    
+    def __init__(self, loop):
+        self._loop = loop
+        
+        # The set of objects which have not yet completed initialisation.
+        self._pending = set()
+        
+        # Futures awaiting the initialisation of an object. Only populated
+        # while something is actually waiting.
+        # {obj: [asyncio.Future, ...], ...}
+        self._waiters = {}
+    
+    def add(self, obj):
+        """Record that the specified object has yet to be initialised."""
+        self._pending.add(obj)
+    
+    def set(self, obj):
+        """Mark the specified object as initialised."""
+        self._pending.discard(obj)
+        if not self._pending:
+            # NB: Sets never shrink; release the (potentially large) table
+            # left over from discovering the network.
+            self._pending = set()
+        for future in self._waiters.pop(obj, ()):
+            if not future.done():
+                future.set_result(None)
+    
+    async def wait(self, obj):
+        """Wait until the specified object has been marked as initialised."""
+        if obj not in self._pending:
+            return
+        future = self._loop.create_future()
+        self._waiters.setdefault(obj, []).append(future)
+        await future
 
 
 class Value(object):
     """
     Logic which keeps a ZWave value object in sync with its Qth interface.
+    
+    Networks may contain many thousands of values so this class is slotted
+    and holds only a reference to its parent :py:class:`Node` (through which
+    the Qth client and initialisation table are accessed) and its own label.
+    Its paths are built on demand from the node's shared value path prefix.
     """
-    def __init__(self, client, loop, ozw_network, ozw_value, qth_base_path, used_labels):
-        self._client = client
-        self._loop = loop
-        self._ozw_network = ozw_network
+    
+    __slots__ = ["_node", "_ozw_value", "_label", "_expected_values",
+                 "_last_qth_value", "_last_qth_units"]
+    
+    def __init__(self, node, ozw_value, label):
+        self._node = node
         self._ozw_value = ozw_value
+        self._label = label
         
-        self._is_initialised = asyncio.Event(loop=self._loop)
-        
-        self._label = normalise_value_label(self._ozw_value.label, used_labels)
-        used_labels.add(self._label)
-        
-        self._value_path = (
-            qth_base_path +
-            "values/{}".format(self._label))
-        self._units_path = "{}/units".format(self._value_path)
-        self._refresh_path = "{}/refresh".format(self._value_path)
+        node._initialisation.add(self)
 
         # Values reported by zwave and set in Qth which we expect to shortly
         # receive echoed back from Qth (and we should ignore)
@@ -65,12 +104,28 @@ class Value(object):
         # Last units written to Qth
         self._last_qth_units = qth.Empty
     
+    @property
+    def _client(self):
+        return self._node._client
+    
+    @property
+    def _value_path(self):
+        return self._node._values_base_path + self._label
+    
+    @property
+    def _units_path(self):
+        return self._value_path + "/units"
+    
+    @property
+    def _refresh_path(self):
+        return self._value_path + "/refresh"
+    
     async def init_async(self):
         """
         Complete registration of the value. Must be called after instantiation.
         """
         try:
-            await asyncio.wait([
+            await asyncio.gather(
                 self._client.register(
                     self._value_path,
                     qth.PROPERTY_MANY_TO_ONE,
@@ -90,28 +145,28 @@ class Value(object):
                                             self._on_qth_value_set),
                 self._client.watch_event(self._refresh_path,
                                          self._on_refresh),
-            ], loop=self._loop)
+            )
         finally:
-            self._is_initialised.set()
+            self._node._initialisation.set(self)
     
     async def remove(self):
         """
         Unregister this value from Qth.
         """
-        await self._is_initialised.wait()
+        await self._node._initialisation.wait(self)
         
         # NB: Do this first to avoid receiving the deletion callback
         await self._client.unwatch_property(self._value_path,
                                             self._on_qth_value_set)
         
-        await asyncio.wait([
+        await asyncio.gather(
             self._client.unregister(self._value_path),
             self._client.unregister(self._units_path),
             self._client.unregister(self._refresh_path),
             self._client.delete_property(self._value_path),
             self._client.delete_property(self._units_path),
             self._client.unwatch_event(self._refresh_path, self._on_refresh),
-        ], loop=self._loop)
+        )
     
     async def _on_refresh(self, _topic, _value):
         """Called when the refresh event is sent."""
@@ -157,43 +212,72 @@ class Value(object):
                                                 self._last_qth_value)
 
 
+def _node_path(suffix):
+    """
+    Define a property giving the Qth path of a node attribute. Paths are
+    built on demand (rather than stored per-node) since they're only needed
+    during (un)registration.
+    """
+    return property(lambda self: self._qth_base_path + suffix)
+
+
 class Node(object):
     """
     Logic which keeps a ZWave node object in sync with its Qth interface.
     """
-    def __init__(self, client, loop, ozw_network, ozw_node, qth_base_path):
-        self._client = client
-        self._loop = loop
-        self._ozw_network = ozw_network
+    
+    __slots__ = ["_network", "_ozw_node", "_qth_base_path", "_values_base_path", "_values",
+                 "_last_statistics"]
+    
+    _is_failed_path = _node_path("is_failed")
+    _manufacturer_id_path = _node_path("manufacturer_id")
+    _manufacturer_name_path = _node_path("manufacturer_name")
+    _neighbours_path = _node_path("neighbours")
+    _product_id_path = _node_path("product_id")
+    _product_name_path = _node_path("product_name")
+    _product_type_path = _node_path("product_type")
+    _statistics_path = _node_path("statistics")
+    _heal_path = _node_path("heal")
+    _set_config_param_path = _node_path("set_config_param")
+    _remove_failed_node_path = _node_path("remove_failed_node")
+    
+    def __init__(self, network, ozw_node):
+        self._network = network
         self._ozw_node = ozw_node
         
-        self._used_value_labels = set()
-        
-        self._is_initialised = asyncio.Event(loop=self._loop)
-        
-        self._qth_base_path = (qth_base_path +
-                               "nodes/{}/".format(self._ozw_node.node_id))
+        self._qth_base_path = sys.intern(
+            network._qth_base_path +
+            "nodes/{}/".format(self._ozw_node.node_id))
         
-        self._is_failed_path = self._qth_base_path + "is_failed"
-        self._manufacturer_id_path = self._qth_base_path + "manufacturer_id"
-        self._manufacturer_name_path = self._qth_base_path + "manufacturer_name"
-        self._neighbours_path = self._qth_base_path + "neighbours"
-        self._product_id_path = self._qth_base_path + "product_id"
-        self._product_name_path = self._qth_base_path + "product_name"
-        self._product_type_path = self._qth_base_path + "product_type"
-        self._heal_path = self._qth_base_path + "heal"
-        self._set_config_param_path = self._qth_base_path + "set_config_param"
-        self._remove_failed_node_path = self._qth_base_path + "remove_failed_node"
+        # Shared prefix of all value paths belonging to this node.
+        self._values_base_path = sys.intern(self._qth_base_path + "values/")
         
         # {ozw.ZWaveValue: Value, ...}
         self._values = {}
+        
+        # Last communication statistics written to Qth
+        self._last_statistics = None
+        
+        self._initialisation.add(self)
+    
+    @property
+    def _client(self):
+        return self._network._client
+    
+    @property
+    def _ozw_network(self):
+        return self._network._ozw_network
+    
+    @property
+    def _initialisation(self):
+        return self._network._initialisation
     
     async def init_async(self):
         """
         Complete registration of the node. Must be called after instantiation.
         """
         try:
-            await asyncio.wait([
+            await asyncio.gather(
                 self._client.register(
                     self._is_failed_path,
                     qth.PROPERTY_ONE_TO_MANY,
@@ -231,6 +315,13 @@ class Node(object):
                     qth.PROPERTY_ONE_TO_MANY,
                     "String. The ZWave product type code.",
                     delete_on_unregister=True),
+                self._client.register(
+                    self._statistics_path,
+                    qth.PROPERTY_ONE_TO_MANY,
+                    "Object. Communication statistics for this node (frames "
+                    "sent, failed, retried and received and round-trip times "
+                    "in milliseconds). Updated periodically.",
+                    delete_on_unregister=True),
                 self._client.register(
                     self._heal_path,
                     qth.EVENT_MANY_TO_ONE,
@@ -250,22 +341,26 @@ class Node(object):
                     "this node. Only use on nodes whose 'is_failed' property is "
                     "true."),
                 self.on_node_changed(),
+                # NB: Value events are handled in a separate task group and
+                # so may run before this node was added to the network (in
+                # which case they are dropped). Register any such values now.
+                self.on_value_changed(None),
                 self._client.watch_event(self._heal_path,
                                          self._on_heal),
                 self._client.watch_event(self._set_config_param_path,
                                          self._on_set_config_param),
                 self._client.watch_event(self._remove_failed_node_path,
                                          self._on_remove_failed_node),
-            ], loop=self._loop)
+            )
         finally:
-            self._is_initialised.set()
+            self._initialisation.set(self)
     
     async def remove(self):
         """
         Unregister this node from Qth.
         """
-        await self._is_initialised.wait()
-        await asyncio.wait([
+        await self._initialisation.wait(self)
+        await asyncio.gather(
             self._client.unregister(self._is_failed_path),
             self._client.unregister(self._manufacturer_id_path),
             self._client.unregister(self._manufacturer_name_path),
@@ -273,6 +368,7 @@ class Node(object):
             self._client.unregister(self._product_id_path),
             self._client.unregister(self._product_name_path),
             self._client.unregister(self._product_type_path),
+            self._client.unregister(self._statistics_path),
             self._client.unregister(self._heal_path),
             self._client.unregister(self._set_config_param_path),
             self._client.unregister(self._remove_failed_node_path),
@@ -283,15 +379,14 @@ class Node(object):
             self._client.delete_property(self._product_id_path),
             self._client.delete_property(self._product_name_path),
             self._client.delete_property(self._product_type_path),
+            self._client.delete_property(self._statistics_path),
             self._client.unwatch_event(self._heal_path,
                                        self._on_heal),
             self._client.unwatch_event(self._set_config_param_path,
                                        self._on_set_config_param),
             self._client.unwatch_event(self._remove_failed_node_path,
                                        self._on_remove_failed_node),
-        ] + [
-            value.remove() for value in self._values.values()
-        ], loop=self._loop)
+            *(value.remove() for value in self._values.values()))
     
     def _on_heal(self, _topic, _arg):
         self._ozw_node.heal()
@@ -309,7 +404,7 @@ class Node(object):
         """
         Call when the node has changed for some reason.
         """
-        await asyncio.wait([
+        await asyncio.gather(
             self._client.set_property(self._is_failed_path,
                                       self._ozw_node.is_failed),
             self._client.set_property(self._manufacturer_id_path,
@@ -324,7 +419,15 @@ class Node(object):
                                       self._ozw_node.product_name),
             self._client.set_property(self._product_type_path,
                                       self._ozw_node.product_type),
-        ], loop=self._loop)
+        )
+    
+    async def on_statistics(self, statistics):
+        """
+        Call with newly collected communication statistics for this node.
+        """
+        if statistics != self._last_statistics:
+            self._last_statistics = statistics
+            await self._client.set_property(self._statistics_path, statistics)
     
     async def on_value_changed(self, changed_ozw_value):
         """
@@ -338,15 +441,15 @@ class Node(object):
         
         todo = []
         
-        # Add new values
-        for ozw_value in added:
-            value = Value(
-                self._client,
-                self._loop,
-                self._ozw_network,
-                ozw_value,
-                self._qth_base_path,
-                self._used_value_labels)
+        # Add new values (in a consistent order so that labels allocated for
+        # the first time are deterministic)
+        label_index = self._network._label_index
+        for ozw_value in sorted(added, key=lambda v: v.value_id):
+            label = label_index.get_label(self._ozw_node.home_id,
+                                          self._ozw_node.node_id,
+                                          ozw_value.value_id,
+                                          ozw_value.label)
+            value = Value(self, ozw_value, label)
             self._values[ozw_value] = value
             todo.append(value.init_async())
         
@@ -355,23 +458,38 @@ class Node(object):
             value = self._values.pop(ozw_value)
             todo.append(value.remove())
         
-        if changed_ozw_value not in removed:
+        if changed_ozw_value is not None and changed_ozw_value not in removed:
             todo.append(
                 self._values[changed_ozw_value].on_zwave_value_changed())
         
         if todo:
-            await asyncio.wait(todo, loop=self._loop)
+            await asyncio.gather(*todo)
 
 class Network(object):
     """
     Logic for keeping a ZWave network object in sync with its Qth interface.
     """
     
-    def __init__(self, client, loop, ozw_network, qth_base_path):
+    def __init__(self, client, loop, ozw_network, qth_base_path,
+                 heal_scheduler=None, statistics_interval=60.0,
+                 label_index=None, tasks=None):
         self._client = client
         self._loop = loop
         self._ozw_network = ozw_network
-        self._qth_base_path = qth_base_path
+        self._qth_base_path = sys.intern(qth_base_path)
+        
+        # The group in which long-running background tasks (healing and
+        # statistics collection) are run
+        self._tasks = tasks
+        if self._tasks is None:
+            self._tasks = TaskGroup(self._loop, "background")
+        
+        # Schedules paced heals of degraded nodes
+        self._heal_scheduler = heal_scheduler
+        if self._heal_scheduler is None:
+            self._heal_scheduler = HealScheduler(
+                self._client, self._loop, self._ozw_network,
+                self._qth_base_path, tasks=self._tasks)
         
         self._ready_path = self._qth_base_path + "ready"
         self._state_path = self._qth_base_path + "state"
@@ -379,12 +497,28 @@ class Network(object):
         self._heal_path = self._qth_base_path + "heal_network"
         self._add_node_path = self._qth_base_path + "add_node"
         self._remove_node_path = self._qth_base_path + "remove_node"
+        self._statistics_path = self._qth_base_path + "statistics"
         
         self._last_is_ready = None
         self._last_state = None
         self._last_home_id = None
         
-        self._is_initialised = asyncio.Event(loop=self._loop)
+        # Periodically collects node communication statistics (disabled if no
+        # interval given)
+        self._statistics_collector = None
+        if statistics_interval:
+            self._statistics_collector = StatisticsCollector(
+                self._loop, self._ozw_network, statistics_interval,
+                self.on_statistics, self._tasks)
+        
+        # Labels allocated to values (used to form their paths)
+        self._label_index = label_index
+        if self._label_index is None:
+            self._label_index = LabelIndex(self._loop)
+        
+        # Initialisation state of the network and all of its nodes and values
+        self._initialisation = InitialisationTable(self._loop)
+        self._initialisation.add(self)
         
         # {owz.ZWaveNode: Node, ...}
         self._nodes = {}
@@ -395,7 +529,7 @@ class Network(object):
         instantiation.
         """
         try:
-            await asyncio.wait([
+            await asyncio.gather(
                 self._client.register(
                     self._ready_path,
                     qth.PROPERTY_ONE_TO_MANY,
@@ -414,7 +548,9 @@ class Network(object):
                 self._client.register(
                     self._heal_path,
                     qth.EVENT_MANY_TO_ONE,
-                    "Trigger the network healing process."),
+                    "Heal degraded nodes one batch at a time (see "
+                    "'heal_status' for progress). Send 'all' to heal every "
+                    "node or 'stop' to abort a heal in progress."),
                 self._client.register(
                     self._add_node_path,
                     qth.EVENT_MANY_TO_ONE,
@@ -423,33 +559,57 @@ class Network(object):
                     self._remove_node_path,
                     qth.EVENT_MANY_TO_ONE,
                     "Set the controller to node-removing mode."),
+                self._client.register(
+                    self._statistics_path,
+                    qth.PROPERTY_ONE_TO_MANY,
+                    "Object. Network-wide communication statistics: frame "
+                    "counts summed over all nodes, the mean average response "
+                    "time and controller error counts. Updated "
+                    "periodically.",
+                    delete_on_unregister=True),
                 self._client.watch_event(self._heal_path, self.on_heal),
                 self._client.watch_event(self._add_node_path, self.on_add_node),
                 self._client.watch_event(self._remove_node_path, self.on_remove_node),
                 self.on_network_state_change(),
-            ], loop=self._loop)
+                self._heal_scheduler.init_async(),
+            )
         finally:
-            self._is_initialised.set()
+            self._initialisation.set(self)
+        
+        if self._statistics_collector is not None:
+            self._statistics_collector.start()
     
     async def remove(self):
         """
         Unregister the network from Qth.
         """
-        await self._is_initialised.wait()
-        await asyncio.wait([
+        await self._initialisation.wait(self)
+        
+        self.stop()
+        
+        await asyncio.gather(
             self._client.unregister(self._ready_path),
             self._client.unregister(self._state_path),
             self._client.unregister(self._home_id_path),
             self._client.unregister(self._heal_path),
             self._client.unregister(self._add_node_path),
             self._client.unregister(self._remove_node_path),
+            self._client.unregister(self._statistics_path),
             self._client.delete_property(self._ready_path),
             self._client.delete_property(self._state_path),
             self._client.delete_property(self._home_id_path),
+            self._client.delete_property(self._statistics_path),
             self._client.unwatch_event(self._heal_path, self.on_heal),
-        ] + [
-            node.remove() for node in self._nodes.values()
-        ], loop=self._loop)
+            self._heal_scheduler.remove(),
+            *(node.remove() for node in self._nodes.values()))
+    
+    def stop(self):
+        """
+        Stop all background activity (statistics collection and healing).
+        """
+        if self._statistics_collector is not None:
+            self._statistics_collector.stop()
+        self._heal_scheduler.close()
     
     async def on_network_state_change(self):
         """Call when the network state may have changed."""
@@ -478,7 +638,7 @@ class Network(object):
             self._last_home_id = home_id
         
         if todo:
-            await asyncio.wait(todo, loop=self._loop)
+            await asyncio.gather(*todo)
     
     async def on_nodes_changed(self, changed_ozw_node):
         """Call when the set of nodes may have changed."""
@@ -492,12 +652,7 @@ class Network(object):
         
         # Add new nodes
         for ozw_node in added:
-            node = Node(
-                self._client,
-                self._loop,
-                self._ozw_network,
-                ozw_node,
-                self._qth_base_path)
+            node = Node(self, ozw_node)
             self._nodes[ozw_node] = node
             todo.append(node.init_async())
         
@@ -506,20 +661,35 @@ class Network(object):
             node = self._nodes.pop(ozw_node)
             todo.append(node.remove())
         
-        if changed_ozw_node not in removed:
+        if changed_ozw_node is not None and changed_ozw_node not in removed:
             todo.append(self._nodes[changed_ozw_node].on_node_changed())
         
         if todo:
-            await asyncio.wait(todo, loop=self._loop)
+            await asyncio.gather(*todo)
     
     async def on_value_changed(self, ozw_node, ozw_value):
         """Call when the value of a node may have changed."""
         if ozw_node in self._nodes:
             await self._nodes[ozw_node].on_value_changed(ozw_value)
     
-    async def on_heal(self, _path, _value):
+    async def on_statistics(self, node_statistics, summary):
+        """
+        Called with newly collected node communication statistics.
+        """
+        todo = [self._client.set_property(self._statistics_path, summary)]
+        for node in self._nodes.values():
+            statistics = node_statistics.get(node._ozw_node.node_id)
+            if statistics is not None:
+                todo.append(node.on_statistics(statistics))
+        
+        await asyncio.gather(*todo)
+    
+    async def on_heal(self, _path, value):
         """Called when the 'heal_network' event is fired."""
-        self._ozw_network.heal(True)
+        if value == "stop":
+            self._heal_scheduler.stop()
+        else:
+            self._heal_scheduler.start(all_nodes=(value == "all"))
     
     async def on_add_node(self, _path, _value):
         """Called when the 'add_node' event is fired."""
@@ -532,32 +702,165 @@ class Network(object):
 
 class QthZwave(object):
     
+    # Raw OpenZWave notification types handled by the fast notification path
+    # (see _init_zwave_fast_callbacks).
+    NODE_NOTIFICATIONS = frozenset([
+        "NodeAdded",
+        "NodeRemoved",
+        "NodeEvent",
+    ])
+    VALUE_NOTIFICATIONS = frozenset([
+        "ValueAdded",
+        "ValueRemoved",
+        "ValueRefreshed",
+        "ValueChanged",
+    ])
+    
     def __init__(self, zwave_config_path, zwave_user_path,
                  zwave_device="/dev/ttyACM0",
                  qth_base_path="sys/zwave/",
-                 host=None, port=None, keepalive=10, loop=None):
+                 host=None, port=None, keepalive=10, loop=None,
+                 fast_notifications=False, heal_options=None,
+                 statistics_interval=60.0, max_concurrent_tasks=100):
         self._loop = loop or asyncio.get_event_loop()
         self._qth_base_path = qth_base_path
+        self._fast_notifications = fast_notifications
+        
+        # Set when closing, after which ZWave notifications are ignored
+        self._closing = False
+        
+        # The pydispatch receivers connected by _init_zwave_callbacks.
+        # [(receiver, signal), ...]
+        self._dispatcher_receivers = []
+        
+        # Supervised groups for the tasks spawned in response to ZWave
+        # events. Kept separate so that (e.g.) a flood of value changes
+        # cannot hold up node or network state changes.
+        self._network_tasks = TaskGroup(self._loop, "network",
+                                        max_concurrent_tasks)
+        self._node_tasks = TaskGroup(self._loop, "node",
+                                     max_concurrent_tasks)
+        self._value_tasks = TaskGroup(self._loop, "value",
+                                      max_concurrent_tasks)
         
+        # Supervised group for long-running background tasks (healing and
+        # statistics collection)
+        self._background_tasks = TaskGroup(self._loop, "background")
+        
+        self._task_groups = [self._network_tasks,
+                             self._node_tasks,
+                             self._value_tasks,
+                             self._background_tasks]
+        
+        # NB: The Qth client uses the current event loop
         self._client = qth.Client("qth_zwave",
                                   "Exposes Z-wave devices via Qth.",
-                                  loop=self._loop, host=host, port=port,
+                                  host=host, port=port,
                                   keepalive=keepalive)
         
         # Setup the OpenZWave client
         self._init_openzwave(zwave_device, zwave_config_path, zwave_user_path)
         
+        # Persistent record of the labels allocated to each value, ensuring
+        # value paths remain the same between restarts
+        self._label_index = LabelIndex(
+            self._loop, os.path.join(zwave_user_path, "qth_zwave_labels.json"))
+        
         # Setup the Qth mirror of the ZWave state
         self._network = Network(self._client,
                                 self._loop,
                                 self._ozw_network,
-                                self._qth_base_path)
-        self._loop.create_task(self._network.init_async())
+                                self._qth_base_path,
+                                HealScheduler(self._client,
+                                              self._loop,
+                                              self._ozw_network,
+                                              self._qth_base_path,
+                                              tasks=self._background_tasks,
+                                              **(heal_options or {})),
+                                statistics_interval,
+                                self._label_index,
+                                self._background_tasks)
+        self._network_tasks.spawn(self._network.init_async())
         
         self._init_zwave_callbacks()
+        if self._fast_notifications:
+            self._init_zwave_fast_callbacks()
         
         self._ozw_network.start()
     
+    async def close(self, timeout=5.0):
+        """
+        Shut down the bridge. Each of the following steps is bounded by
+        ``timeout`` seconds:
+        
+        1. Stop accepting new ZWave events and stop background activity.
+        2. Wait for events already being processed (and background tasks,
+           e.g. heal passes, to publish their final state) to complete.
+           Any which remain after half the timeout are cancelled and given
+           the remaining half to finish.
+        3. Disconnect from Qth. This unregisters every path (and deletes the
+           properties registered with delete_on_unregister) in a single
+           message rather than republishing the registration once per path
+           as :py:meth:`Network.remove` would.
+        4. Stop the OpenZWave network. This blocks and so is run in a daemon
+           thread which is abandoned (rather than joined at exit) if it
+           does not complete in time.
+        
+        Finally (even if an earlier step fails), any newly allocated value
+        labels are saved.
+        """
+        try:
+            # NB: OpenZWave may continue to deliver notifications until it
+            # has stopped, possibly after the event loop has been closed.
+            self._closing = True
+            for receiver, signal in self._dispatcher_receivers:
+                dispatcher.disconnect(receiver, signal, weak=False)
+            self._dispatcher_receivers = []
+            
+            for group in self._task_groups:
+                group.close()
+            self._network.stop()
+            
+            # Half of the timeout is given for tasks to complete and the
+            # remainder for any cancelled tasks to finish cleaning up.
+            drained = await asyncio.gather(
+                *(group.wait(timeout / 2.0) for group in self._task_groups))
+            if not all(drained):
+                for group in self._task_groups:
+                    group.cancel()
+                await asyncio.gather(
+                    *(group.wait(timeout / 2.0)
+                      for group in self._task_groups))
+            
+            try:
+                await asyncio.wait_for(self._client.close(), timeout)
+            except asyncio.TimeoutError:
+                # The broker will expire the client's will instead
+                pass
+            
+            stopped = concurrent.futures.Future()
+            
+            def stop():
+                # NB: Once running, the future can no longer be cancelled by
+                # wait_for timing out.
+                stopped.set_running_or_notify_cancel()
+                try:
+                    self._ozw_network.stop()
+                except BaseException as exc:
+                    stopped.set_exception(exc)
+                else:
+                    stopped.set_result(None)
+            
+            threading.Thread(target=stop, name="qth_zwave-stop",
+                             daemon=True).start()
+            try:
+                await asyncio.wait_for(
+                    asyncio.wrap_future(stopped, loop=self._loop), timeout)
+            except asyncio.TimeoutError:
+                pass
+        finally:
+            await self._label_index.save()
+    
     def _init_openzwave(self, zwave_device, zwave_config_path, zwave_user_path):
         """Initialise the OpenZWave client, leaving it ready to start."""
         # Configure OpenZWave
@@ -579,42 +882,126 @@ class QthZwave(object):
         
         def threadsafe_wrap(f):
             def wrapper(*args, **kwargs):
-                self._loop.call_soon_threadsafe(functools.partial(f, *args, **kwargs))
+                if self._closing:
+                    return
+                try:
+                    self._loop.call_soon_threadsafe(
+                        functools.partial(f, *args, **kwargs))
+                except RuntimeError:
+                    # Event loop closed
+                    pass
             return wrapper
         
+        def connect(f, signal):
+            receiver = threadsafe_wrap(f)
+            dispatcher.connect(receiver, signal, weak=False)
+            self._dispatcher_receivers.append((receiver, signal))
+        
         for state in [ZWaveNetwork.SIGNAL_NETWORK_FAILED,
                       ZWaveNetwork.SIGNAL_NETWORK_STARTED,
                       ZWaveNetwork.SIGNAL_NETWORK_READY,
                       ZWaveNetwork.SIGNAL_NETWORK_STOPPED,
                       ZWaveNetwork.SIGNAL_NETWORK_RESETTED,
                       ZWaveNetwork.SIGNAL_NETWORK_AWAKED]:
-            dispatcher.connect(
-                threadsafe_wrap(lambda *_, **__:
-                    self._loop.create_task(
-                        self._network.on_network_state_change())),
-                state, weak=False)
+            connect(lambda *_, **__:
+                        self._network_tasks.spawn(
+                            self._network.on_network_state_change()),
+                    state)
+        
+        # Node and value changes are delivered by _init_zwave_fast_callbacks
+        # instead when enabled.
+        if self._fast_notifications:
+            return
         
         for signal in [ZWaveNetwork.SIGNAL_NODE_ADDED,
                        ZWaveNetwork.SIGNAL_NODE_REMOVED,
                        ZWaveNetwork.SIGNAL_NODE_EVENT]:
-            dispatcher.connect(
-                threadsafe_wrap(lambda node, *_, **__:
-                    self._loop.create_task(
-                        self._network.on_nodes_changed(node))),
-                signal, weak=False)
+            connect(lambda node, *_, **__:
+                        self._node_tasks.spawn(
+                            self._network.on_nodes_changed(node)),
+                    signal)
         
         for signal in [ZWaveNetwork.SIGNAL_VALUE_ADDED,
                        ZWaveNetwork.SIGNAL_VALUE_REMOVED,
                        ZWaveNetwork.SIGNAL_VALUE_REFRESHED,
                        ZWaveNetwork.SIGNAL_VALUE_CHANGED]:
-            dispatcher.connect(
-                threadsafe_wrap(lambda node, value, *_, **__:
-                    self._loop.create_task(
-                        self._network.on_value_changed(node, value))),
-                signal, weak=False)
+            connect(lambda node, value, *_, **__:
+                        self._value_tasks.spawn(
+                            self._network.on_value_changed(node, value)),
+                    signal)
+    
+    def _init_zwave_fast_callbacks(self):
+        """
+        Setup callbacks for node and value OpenZWave events which run directly
+        within python-openzwave's libopenzwave notification watcher rather
+        than via pydispatch receivers.
+        
+        libopenzwave only keeps a single watcher alive (and
+        :py:meth:`ZWaveNetwork.stop` removes whichever was added last) so
+        rather than adding a second watcher, python-openzwave's own watcher is
+        wrapped. Our handlers then run in the same callback, just after
+        python-openzwave has updated its node and value objects. (The
+        pydispatch signals python-openzwave sends have no receivers for node
+        and value events and so cost very little.)
+        
+        Must be called before the ZWaveNetwork is started so that the wrapped
+        watcher is the one registered and no notifications are missed.
+        """
+        ozw_network = self._ozw_network
+        ozw_callback = ozw_network.zwcallback
+        
+        network = self._network
+        call_soon_threadsafe = self._loop.call_soon_threadsafe
+        spawn_node_task = self._node_tasks.spawn
+        spawn_value_task = self._value_tasks.spawn
+        
+        node_notifications = self.NODE_NOTIFICATIONS
+        value_notifications = self.VALUE_NOTIFICATIONS
+        
+        def spawn_threadsafe(spawn, coro):
+            try:
+                call_soon_threadsafe(spawn, coro)
+            except RuntimeError:
+                # Event loop closed
+                coro.close()
+        
+        def zwcallback(args):
+            ozw_callback(args)
+            
+            if self._closing:
+                return
+            
+            # NB: Called from the OpenZWave thread. Nodes and values are looked
+            # up here so that they reflect the state at the time of the
+            # notification. Removed nodes/values will no longer be present and
+            # are passed on as None.
+            notification_type = args["notificationType"]
+            if notification_type in value_notifications:
+                ozw_node = ozw_network.nodes.get(args["nodeId"])
+                ozw_value = (ozw_node.values.get(args["valueId"]["id"])
+                             if ozw_node is not None else None)
+                spawn_threadsafe(
+                    spawn_value_task,
+                    network.on_value_changed(ozw_node, ozw_value))
+            elif notification_type in node_notifications:
+                ozw_node = ozw_network.nodes.get(args["nodeId"])
+                spawn_threadsafe(
+                    spawn_node_task, network.on_nodes_changed(ozw_node))
+        
+        # NB: ZWaveNetwork.start() registers (and stop() removes)
+        # self.zwcallback, so shadow the method with our wrapper.
+        ozw_network.zwcallback = zwcallback
 
 def main():
     import argparse
+    import signal
+    
+    def time_of_day(value):
+        try:
+            return datetime.datetime.strptime(value, "%H:%M").time()
+        except ValueError:
+            raise argparse.ArgumentTypeError(
+                "expected a time of day as HH:MM, got {!r}".format(value))
     
     parser = argparse.ArgumentParser(description="A Qth bridge for ZWave")
     
@@ -629,6 +1016,19 @@ def main():
                         help="Path of ZWave controller serial port.")
     parser.add_argument("--qth-base", "-q", default="sys/zwave/",
                         help="Prefix for all Qth values.")
+    parser.add_argument("--fast-notifications", action="store_true",
+                        help="Receive node and value notifications directly "
+                             "from libopenzwave rather than via "
+                             "python-openzwave's signal dispatcher.")
+    
+    parser.add_argument("--heal-at", default=None, type=time_of_day,
+                        help="Automatically heal degraded nodes at this time "
+                             "(HH:MM) each day.")
+    parser.add_argument("--heal-nodes-per-step", default=1, type=int,
+                        help="Number of nodes to heal at once.")
+    parser.add_argument("--heal-step-interval", default=120.0, type=float,
+                        help="Seconds to wait between healing each batch of "
+                             "nodes.")
     
     parser.add_argument("--host", "-H", default=None,
                         help="Qth (MQTT) server hostname.")
@@ -639,10 +1039,38 @@ def main():
     parser.add_argument("--version", "-V", action="version",
                         version="$(prog)s {}".format(__version__))
     
+    parser.add_argument("--statistics-interval", default=60.0, type=float,
+                        help="Seconds between publishing node communication "
+                             "statistics (0 to disable).")
+    parser.add_argument("--max-concurrent-tasks", default=100, type=int,
+                        help="Maximum number of concurrently processed "
+                             "network, node and value events (each).")
+    
+    parser.add_argument("--uvloop", action="store_true",
+                        help="Use the uvloop event loop implementation "
+                             "(requires uvloop to be installed).")
+    parser.add_argument("--shutdown-timeout", default=5.0, type=float,
+                        help="Maximum number of seconds each shutdown step "
+                             "may take.")
+    parser.add_argument("--debug", action="store_true",
+                        help="Enable asyncio debug mode.")
+    
     args = parser.parse_args()
     
-    loop = asyncio.get_event_loop()
-    loop.set_debug(True)
+    heal_options = {
+        "nodes_per_step": args.heal_nodes_per_step,
+        "step_interval": args.heal_step_interval,
+    }
+    if args.heal_at is not None:
+        heal_options["overnight_time"] = args.heal_at
+    
+    if args.uvloop:
+        import uvloop
+        loop = uvloop.new_event_loop()
+    else:
+        loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    loop.set_debug(args.debug)
     
     qth_zwave = QthZwave(zwave_config_path=args.openzwave_config,
                          zwave_user_path=args.user_path,
@@ -651,8 +1079,35 @@ def main():
                          host=args.host,
                          port=args.port,
                          keepalive=args.keepalive,
-                         loop=loop)
-    loop.run_forever()
+                         loop=loop,
+                         fast_notifications=args.fast_notifications,
+                         heal_options=heal_options,
+                         statistics_interval=args.statistics_interval,
+                         max_concurrent_tasks=args.max_concurrent_tasks)
+    
+    shutdown_tasks = []
+    
+    def shutdown():
+        # NB: Repeated signals are ignored; the shutdown is time-bounded
+        if not shutdown_tasks:
+            task = loop.create_task(qth_zwave.close(args.shutdown_timeout))
+            task.add_done_callback(lambda _: loop.stop())
+            shutdown_tasks.append(task)
+    
+    try:
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, shutdown)
+    except NotImplementedError:
+        # Signal handlers are not supported on all platforms, fall back on
+        # KeyboardInterrupt.
+        pass
+    
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        loop.run_until_complete(qth_zwave.close(args.shutdown_timeout))
+    finally:
+        loop.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,299 @@
+"""
+A targeted, paced alternative to OpenZWave's network-wide heal.
+
+:py:meth:`openzwave.network.ZWaveNetwork.heal` heals every node on the
+network at once which can saturate the mesh for minutes at a time. The
+:py:class:`HealScheduler` instead heals only nodes which appear to be
+degraded and does so a few nodes at a time, pausing between each batch so
+that ordinary traffic is not disturbed.
+"""
+
+import asyncio
+import datetime
+
+import qth
+
+from .statistics import read_node_statistics
+from .tasks import TaskGroup
+
+
+class HealScheduler(object):
+    """
+    Heals degraded ZWave nodes a batch at a time, publishing its progress via
+    Qth.
+    
+    A node is considered degraded if any of the following are true:
+    
+    * It has been marked as failed by the ZWave controller.
+    * It has fewer than ``min_neighbours`` neighbours.
+    * More than ``max_failure_ratio`` of the frames sent to it since the
+      previous heal pass failed to be delivered.
+    * It required more than ``max_retry_ratio`` retries per frame sent since
+      the previous heal pass.
+    
+    Parameters
+    ----------
+    client : :py:class:`qth.Client`
+    loop : :py:class:`asyncio.AbstractEventLoop`
+    ozw_network : :py:class:`openzwave.network.ZWaveNetwork`
+    qth_base_path : str
+        The network's Qth base path (e.g. "sys/zwave/").
+    nodes_per_step : int
+        Number of nodes to heal at once.
+    step_interval : float
+        Number of seconds to wait after healing each batch of nodes.
+    min_neighbours : int
+    max_failure_ratio : float
+    max_retry_ratio : float
+        Thresholds used to decide if a node is degraded (see above).
+    overnight_time : :py:class:`datetime.time` or None
+        If given, automatically heal degraded nodes at this time each day.
+    tasks : :py:class:`qth_zwave.tasks.TaskGroup` or None
+        The task group to run heal passes (and the overnight scheduler) in.
+        If None, a new group is created.
+    """
+    
+    def __init__(self, client, loop, ozw_network, qth_base_path,
+                 nodes_per_step=1, step_interval=120.0,
+                 min_neighbours=2, max_failure_ratio=0.1, max_retry_ratio=0.5,
+                 overnight_time=None, tasks=None):
+        self._client = client
+        self._loop = loop
+        self._ozw_network = ozw_network
+        
+        self._tasks = tasks
+        if self._tasks is None:
+            self._tasks = TaskGroup(self._loop, "heal")
+        
+        self._nodes_per_step = nodes_per_step
+        self._step_interval = step_interval
+        self._min_neighbours = min_neighbours
+        self._max_failure_ratio = max_failure_ratio
+        self._max_retry_ratio = max_retry_ratio
+        self._overnight_time = overnight_time
+        
+        self._status_path = qth_base_path + "heal_status"
+        
+        # The statistics of each node at the end of the last heal pass. Used
+        # to compute failure/retry rates since then.
+        # {node_id: (sent_count, sent_failed, retries), ...}
+        self._last_stats = {}
+        
+        # The currently running heal pass (or None)
+        self._heal_task = None
+        
+        # The task which runs overnight heals (or None)
+        self._overnight_task = None
+        
+        self._status = {
+            "state": "idle",
+            "reason": None,
+            "degraded": {},
+            "pending": [],
+            "healing": [],
+            "healed": [],
+        }
+    
+    async def init_async(self):
+        """
+        Complete registration of the scheduler. Must be called after
+        instantiation.
+        """
+        await asyncio.gather(
+            self._client.register(
+                self._status_path,
+                qth.PROPERTY_ONE_TO_MANY,
+                "Object. Progress of the current (or last) heal pass. "
+                "'state' is 'idle' or 'running', 'reason' gives what "
+                "started the pass, 'degraded' maps node IDs to the reason "
+                "they were selected for healing and 'pending', 'healing' "
+                "and 'healed' list node IDs by progress.",
+                delete_on_unregister=True),
+            self._publish_status(),
+        )
+        
+        if self._overnight_time is not None:
+            self._overnight_task = self._tasks.spawn(self._run_overnight())
+    
+    async def remove(self):
+        """
+        Stop any heal in progress and unregister from Qth.
+        """
+        self.close()
+        
+        await asyncio.gather(
+            self._client.unregister(self._status_path),
+            self._client.delete_property(self._status_path),
+        )
+    
+    @property
+    def is_running(self):
+        """True if a heal pass is currently in progress."""
+        return self._heal_task is not None and not self._heal_task.done()
+    
+    def start(self, all_nodes=False, reason="manual"):
+        """
+        Start a heal pass in the background, if one isn't already running.
+        
+        Parameters
+        ----------
+        all_nodes : bool
+            If True, heal every node (still paced), not just degraded ones.
+        reason : str
+            A short description of why the pass was started, reported via
+            Qth.
+        """
+        if not self.is_running:
+            self._heal_task = self._tasks.spawn(self.heal(all_nodes, reason))
+    
+    def stop(self):
+        """Abort the running heal pass (if any)."""
+        if self.is_running:
+            self._heal_task.cancel()
+        self._heal_task = None
+    
+    def close(self):
+        """Abort any heal in progress and stop any future overnight heals."""
+        self.stop()
+        if self._overnight_task is not None:
+            self._overnight_task.cancel()
+            self._overnight_task = None
+    
+    def get_degraded_reason(self, state):
+        """
+        Given the state of a node (as returned by :py:meth:`read_node_states`)
+        return a short string describing why it appears degraded or None if it
+        doesn't.
+        """
+        if state["is_failed"]:
+            return "failed"
+        
+        if state["neighbours"] < self._min_neighbours:
+            return "few neighbours"
+        
+        sent = state["sent"]
+        failed = state["sent_failed"]
+        retries = state["retries"]
+        last_sent, last_failed, last_retries = self._last_stats.get(
+            state["node_id"], (0, 0, 0))
+        
+        # NB: Counters are reset when OpenZWave restarts
+        if sent < last_sent:
+            last_sent, last_failed, last_retries = (0, 0, 0)
+        
+        sent -= last_sent
+        if sent > 0:
+            if (failed - last_failed) / sent > self._max_failure_ratio:
+                return "failed frames"
+            if (retries - last_retries) / sent > self._max_retry_ratio:
+                return "retries"
+        
+        return None
+    
+    def read_node_states(self):
+        """
+        Read the failure state, neighbour count and communication statistics
+        of every node except the controller. Blocks; called from a worker
+        thread.
+        
+        Returns
+        -------
+        [{"node_id": ..., "is_failed": ..., "neighbours": ..., "sent": ...,
+        "sent_failed": ..., "retries": ..., ...}, ...]
+            Sorted by node ID. The statistics are named as in
+            :py:func:`read_node_statistics`.
+        """
+        controller = self._ozw_network.controller
+        controller_node_id = (controller.node_id
+                              if controller is not None else None)
+        
+        states = []
+        # NB: Copied since the OpenZWave thread may add/remove nodes
+        for node_id, ozw_node in sorted(self._ozw_network.nodes.items()):
+            if node_id == controller_node_id:
+                continue
+            
+            state = read_node_statistics(ozw_node)
+            state["node_id"] = node_id
+            state["is_failed"] = ozw_node.is_failed
+            state["neighbours"] = len(ozw_node.neighbors)
+            states.append(state)
+        
+        return states
+    
+    async def heal(self, all_nodes=False, reason="manual"):
+        """
+        Perform a heal pass, healing ``nodes_per_step`` nodes at a time with
+        ``step_interval`` seconds between each batch.
+        """
+        self._status = {
+            "state": "running",
+            "reason": reason,
+            "degraded": {},
+            "pending": [],
+            "healing": [],
+            "healed": [],
+        }
+        
+        try:
+            states = await self._loop.run_in_executor(
+                None, self.read_node_states)
+            
+            for state in states:
+                degraded_reason = self.get_degraded_reason(state)
+                if degraded_reason is None and all_nodes:
+                    degraded_reason = "requested"
+                if degraded_reason is not None:
+                    node_id = state["node_id"]
+                    self._status["degraded"][str(node_id)] = degraded_reason
+                    self._status["pending"].append(node_id)
+            
+            await self._publish_status()
+            
+            pending = self._status["pending"]
+            while pending:
+                batch = pending[:self._nodes_per_step]
+                del pending[:self._nodes_per_step]
+                
+                self._status["healing"] = batch
+                await self._publish_status()
+                
+                for node_id in batch:
+                    ozw_node = self._ozw_network.nodes.get(node_id)
+                    if ozw_node is not None:
+                        ozw_node.heal(True)
+                
+                await asyncio.sleep(self._step_interval)
+                
+                self._status["healing"] = []
+                self._status["healed"].extend(batch)
+            
+            # Take a new snapshot of the statistics so that the next pass
+            # only considers frames sent after this one.
+            states = await self._loop.run_in_executor(
+                None, self.read_node_states)
+            self._last_stats = {
+                state["node_id"]: (state["sent"],
+                                   state["sent_failed"],
+                                   state["retries"])
+                for state in states
+            }
+        finally:
+            self._status["state"] = "idle"
+            self._status["healing"] = []
+            await self._publish_status()
+    
+    async def _run_overnight(self):
+        """Start a heal pass at the configured time each day."""
+        while True:
+            now = datetime.datetime.now()
+            next_run = datetime.datetime.combine(now.date(),
+                                                 self._overnight_time)
+            if next_run <= now:
+                next_run += datetime.timedelta(days=1)
+            
+            await asyncio.sleep((next_run - now).total_seconds())
+            self.start(reason="overnight")
+    
+    async def _publish_status(self):
+        await self._client.set_property(self._status_path, self._status)
@@ -0,0 +1,189 @@
+"""
+Allocation of the Qth path labels used for ZWave values.
+
+Labels are derived from the (human readable) labels OpenZWave gives each
+value. Since several values on a node may share a label, a numeric suffix is
+added to later duplicates. To ensure a value gets the same label every time
+(regardless of the order in which values are discovered), allocated labels
+are recorded in a :py:class:`LabelIndex` which may be persisted to disk.
+"""
+
+import os
+import re
+import json
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Matches runs of characters not permitted in a label
+_INVALID_LABEL_CHARS = re.compile(r"[^\w]+")
+
+
+def normalise_value_label(label, used_labels=frozenset()):
+    """
+    Given the label of a ZWave value, convert this into a space- and
+    punctuation-free all-lowercase equivalent.
+    """
+    label = _INVALID_LABEL_CHARS.sub("-", label).strip("-").lower()
+    if label not in used_labels:
+        return label
+    else:
+        num = 2
+        while "{}{}".format(label, num) in used_labels:
+            num += 1
+        return "{}{}".format(label, num)
+
+
+class LabelIndex(object):
+    """
+    A record of the label allocated to every ZWave value, keyed by (home_id,
+    node_id, value_id).
+    
+    Parameters
+    ----------
+    loop : :py:class:`asyncio.AbstractEventLoop`
+    filename : str or None
+        If given, the file the index is loaded from (if it exists) and saved
+        to.
+    save_delay : float
+        When new labels are allocated, the index is saved after this many
+        seconds. This ensures the many allocations made while a network is
+        first discovered result in just one write.
+    
+    The file is written (and synced) in a worker thread so that slow storage
+    (e.g. an SD card) does not stall the event loop.
+    """
+    
+    # Version number of the file format
+    VERSION = 1
+    
+    def __init__(self, loop, filename=None, save_delay=10.0):
+        self._loop = loop
+        self._filename = filename
+        self._save_delay = save_delay
+        
+        # {(home_id, node_id, value_id): label, ...}
+        self._labels = {}
+        
+        # The labels allocated within each node.
+        # {(home_id, node_id): set([label, ...]), ...}
+        self._used_labels = {}
+        
+        # The pending call to save (or None)
+        self._save_handle = None
+        
+        # The task running the last save started by the above (or None)
+        self._save_task = None
+        
+        # Held while writing to ensure writes don't interleave
+        self._save_lock = asyncio.Lock()
+        
+        if self._filename is not None:
+            self.load()
+    
+    def __len__(self):
+        return len(self._labels)
+    
+    def load(self):
+        """
+        Load the index from disk (if the file exists).
+        
+        If the file is unreadable, corrupt or of an unsupported version it is
+        moved aside (to ``<filename>.bad``) and the index starts empty rather
+        than preventing startup. Values will be allocated new labels.
+        """
+        labels = {}
+        used_labels = {}
+        try:
+            with open(self._filename, "r") as f:
+                data = json.load(f)
+            
+            if data.get("version") != self.VERSION:
+                raise ValueError("unsupported version {!r}".format(
+                    data.get("version")))
+            
+            for home_id, node_id, value_id, label in data["labels"]:
+                labels[(home_id, node_id, value_id)] = label
+                used_labels.setdefault((home_id, node_id), set()).add(label)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError,
+                AttributeError) as exc:
+            bad_filename = "{}.bad".format(self._filename)
+            logger.error("Could not load label index %s (%s), moving it to "
+                         "%s and starting afresh.",
+                         self._filename, exc, bad_filename)
+            try:
+                os.replace(self._filename, bad_filename)
+            except OSError:
+                logger.exception("Could not move %s aside.", self._filename)
+            return
+        
+        self._labels = labels
+        self._used_labels = used_labels
+    
+    async def save(self):
+        """
+        Write the index to disk immediately (if a filename was given).
+        """
+        if self._save_handle is not None:
+            self._save_handle.cancel()
+            self._save_handle = None
+        
+        if self._filename is None:
+            return
+        
+        async with self._save_lock:
+            # NB: Snapshot the index here since it may change while being
+            # written
+            data = {
+                "version": self.VERSION,
+                "labels": [
+                    [home_id, node_id, value_id, label]
+                    for (home_id, node_id, value_id), label
+                    in sorted(self._labels.items())
+                ],
+            }
+            await self._loop.run_in_executor(None, self._write, data)
+    
+    def _write(self, data):
+        """Write the supplied data to the file. Blocks."""
+        # Write atomically to avoid leaving a truncated file behind
+        tmp_filename = "{}.tmp".format(self._filename)
+        with open(tmp_filename, "w") as f:
+            json.dump(data, f)
+            # Ensure the data reaches the disk before the rename does
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_filename, self._filename)
+    
+    def _on_save_due(self):
+        self._save_handle = None
+        self._save_task = self._loop.create_task(self._save_in_background())
+    
+    async def _save_in_background(self):
+        try:
+            await self.save()
+        except OSError:
+            logger.exception("Could not save label index %s.", self._filename)
+    
+    def get_label(self, home_id, node_id, value_id, ozw_label):
+        """
+        Get the label for a value, allocating (and later saving) one based on
+        the OpenZWave label if the value hasn't been seen before.
+        """
+        key = (home_id, node_id, value_id)
+        label = self._labels.get(key)
+        if label is None:
+            used_labels = self._used_labels.setdefault(
+                (home_id, node_id), set())
+            label = normalise_value_label(ozw_label, used_labels)
+            used_labels.add(label)
+            self._labels[key] = label
+            
+            if self._filename is not None and self._save_handle is None:
+                self._save_handle = self._loop.call_later(
+                    self._save_delay, self._on_save_due)
+        
+        return label
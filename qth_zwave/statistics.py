@@ -0,0 +1,154 @@
+"""
+Periodic collection of per-node communication statistics.
+
+OpenZWave keeps counts of frames sent, received, retried and dropped along
+with round-trip times for every node. The :py:class:`StatisticsCollector`
+periodically reads these for all nodes (in a worker thread, so as not to
+block the event loop) and passes them, along with a network-wide summary, to
+a callback.
+"""
+
+import asyncio
+
+from .tasks import TaskGroup
+
+# Mapping from OpenZWave node statistic names to the names we publish.
+NODE_STATISTICS = {
+    "sentCnt": "sent",
+    "sentFailed": "sent_failed",
+    "retries": "retries",
+    "receivedCnt": "received",
+    "receivedDups": "received_duplicates",
+    "receivedUnsolicited": "received_unsolicited",
+    "averageRequestRTT": "average_request_rtt",
+    "averageResponseRTT": "average_response_rtt",
+    "lastRequestRTT": "last_request_rtt",
+    "lastResponseRTT": "last_response_rtt",
+    "quality": "quality",
+}
+
+# Mapping from OpenZWave driver statistic names to the names we publish in
+# the network-wide summary.
+DRIVER_STATISTICS = {
+    "dropped": "dropped",
+    "readAborts": "read_aborts",
+    "badChecksum": "bad_checksums",
+    "noack": "no_acks",
+    "netbusy": "network_busy",
+    "callbacks": "callbacks",
+    "OOFCnt": "out_of_frame",
+}
+
+# Node statistics which are summed to form the network-wide totals.
+SUMMED_STATISTICS = ["sent", "sent_failed", "retries", "received",
+                     "received_duplicates", "received_unsolicited"]
+
+
+def read_node_statistics(ozw_node):
+    """
+    Read the communication statistics of a node. Blocks (this makes a call
+    into OpenZWave) so should not be called from the event loop thread.
+    
+    Returns
+    -------
+    {name: value, ...}
+        Using the names in :py:data:`NODE_STATISTICS`.
+    """
+    stats = ozw_node.stats
+    return {
+        name: stats[ozw_name]
+        for ozw_name, name in NODE_STATISTICS.items()
+    }
+
+
+class StatisticsCollector(object):
+    """
+    Periodically reads the communication statistics of every node.
+    
+    Parameters
+    ----------
+    loop : :py:class:`asyncio.AbstractEventLoop`
+    ozw_network : :py:class:`openzwave.network.ZWaveNetwork`
+    interval : float
+        Number of seconds between each collection.
+    callback : coroutine function
+        Called after each collection as ``callback(node_statistics,
+        summary)`` where ``node_statistics`` is a dictionary ``{node_id:
+        {name: value, ...}, ...}`` and ``summary`` is a dictionary of
+        network-wide statistics.
+    tasks : :py:class:`qth_zwave.tasks.TaskGroup` or None
+        The task group to run the collector in. If None, a new group is
+        created.
+    """
+    
+    def __init__(self, loop, ozw_network, interval, callback, tasks=None):
+        self._loop = loop
+        self._ozw_network = ozw_network
+        self._interval = interval
+        self._callback = callback
+        
+        self._tasks = tasks
+        if self._tasks is None:
+            self._tasks = TaskGroup(self._loop, "statistics")
+        
+        self._task = None
+    
+    def start(self):
+        """Start collecting statistics periodically."""
+        if self._task is None:
+            self._task = self._tasks.spawn(self._run())
+    
+    def stop(self):
+        """Stop collecting statistics."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+    
+    def read(self):
+        """
+        Read the statistics for all nodes. Blocks; called from a worker
+        thread by the collector.
+        
+        Returns
+        -------
+        node_statistics, summary
+        """
+        node_statistics = {}
+        # NB: Copied since the OpenZWave thread may add/remove nodes
+        for node_id, ozw_node in list(self._ozw_network.nodes.items()):
+            node_statistics[node_id] = read_node_statistics(ozw_node)
+        
+        summary = {
+            name: sum(stats[name] for stats in node_statistics.values())
+            for name in SUMMED_STATISTICS
+        }
+        
+        responding = [stats["average_response_rtt"]
+                      for stats in node_statistics.values()
+                      if stats["average_response_rtt"] > 0]
+        summary["average_response_rtt"] = (
+            sum(responding) / len(responding) if responding else 0)
+        
+        # NB: The controller is not available until the driver is ready
+        controller = self._ozw_network.controller
+        if controller is not None:
+            driver_stats = controller.stats
+            for ozw_name, name in DRIVER_STATISTICS.items():
+                summary[name] = driver_stats[ozw_name]
+        
+        return node_statistics, summary
+    
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                node_statistics, summary = await self._loop.run_in_executor(
+                    None, self.read)
+                await self._callback(node_statistics, summary)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self._loop.call_exception_handler({
+                    "message": "Failed to collect ZWave node statistics.",
+                    "exception": exc,
+                })
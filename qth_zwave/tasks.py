@@ -0,0 +1,101 @@
+"""
+Supervision of the asyncio tasks spawned in response to ZWave events.
+"""
+
+import asyncio
+
+
+class TaskGroup(object):
+    """
+    A supervised group of asyncio tasks.
+    
+    All tasks spawned in the group are tracked until they complete. At most
+    ``max_concurrency`` tasks run at once (tasks beyond this wait, in the
+    order they were spawned, for a running task to complete). Exceptions
+    raised by tasks are reported via the event loop's exception handler
+    rather than being silently discarded.
+    
+    Parameters
+    ----------
+    loop : :py:class:`asyncio.AbstractEventLoop`
+    name : str
+        A name for the group, used in error reports.
+    max_concurrency : int or None
+        The maximum number of tasks in this group which may run at once. If
+        None, the number is unbounded.
+    """
+    
+    def __init__(self, loop, name, max_concurrency=None):
+        self._loop = loop
+        self._name = name
+        
+        self._semaphore = None
+        if max_concurrency is not None:
+            self._semaphore = asyncio.Semaphore(max_concurrency)
+        
+        # The set of tasks which have not yet completed
+        self._tasks = set()
+        
+        # When True, no new tasks will be spawned
+        self._closed = False
+    
+    def __len__(self):
+        """The number of tasks in the group which have not yet completed."""
+        return len(self._tasks)
+    
+    def spawn(self, coro):
+        """
+        Run the supplied coroutine in a new task within this group. Returns
+        the :py:class:`asyncio.Task` or None if the group has been closed (in
+        which case the coroutine is discarded).
+        """
+        if self._closed:
+            coro.close()
+            return None
+        
+        task = self._loop.create_task(self._run(coro))
+        self._tasks.add(task)
+        task.add_done_callback(self._on_task_done)
+        return task
+    
+    async def _run(self, coro):
+        if self._semaphore is None:
+            return await coro
+        
+        try:
+            async with self._semaphore:
+                return await coro
+        finally:
+            # Ensure the coroutine is closed if we were cancelled while
+            # waiting for the semaphore (avoiding a 'never awaited' warning).
+            coro.close()
+    
+    def _on_task_done(self, task):
+        self._tasks.discard(task)
+        
+        if not task.cancelled() and task.exception() is not None:
+            self._loop.call_exception_handler({
+                "message": "Unhandled exception in {} task.".format(
+                    self._name),
+                "exception": task.exception(),
+                "task": task,
+            })
+    
+    def close(self):
+        """Stop accepting new tasks. Existing tasks continue to run."""
+        self._closed = True
+    
+    def cancel(self):
+        """Cancel all tasks in the group."""
+        for task in self._tasks:
+            task.cancel()
+    
+    async def wait(self, timeout=None):
+        """
+        Wait for all tasks currently in the group to complete. Returns True if
+        they completed, False if the timeout expired first.
+        """
+        if not self._tasks:
+            return True
+        _done, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        return not pending
@@ -27,11 +27,21 @@ setup(
         "Programming Language :: Python :: 3",
         "Programming Language :: Python :: 3.4",
         "Programming Language :: Python :: 3.5",
+        "Programming Language :: Python :: 3.6",
+        "Programming Language :: Python :: 3.7",
+        "Programming Language :: Python :: 3.8",
+        "Programming Language :: Python :: 3.9",
+        "Programming Language :: Python :: 3.10",
+        "Programming Language :: Python :: 3.11",
+        "Programming Language :: Python :: 3.12",
     ],
     keywords="mqtt asyncio qth home-automation zwave bridge openzwave",
 
     # Requirements
     install_requires=["qth>=0.6.0", "PyDispatcher>=2.0.5", "python_openzwave"],
+    extras_require={
+        "uvloop": ["uvloop"],
+    },
     
     # Scripts
     entry_points={